@@ -3,7 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -35,6 +36,7 @@ from api.routers import (
 )
 from api.routers import commands as commands_router
 from open_notebook.database.async_migrate import AsyncMigrationManager
+from open_notebook.providers.aivis_speech import AivisSpeechTTSProvider
 
 # Import commands to register them in the API process
 try:
@@ -76,10 +78,17 @@ async def lifespan(app: FastAPI):
 
     logger.success("API initialization completed successfully")
 
+    # Prebake AivisSpeech voice previews in the background so startup isn't delayed
+    preview_task = asyncio.create_task(AivisSpeechTTSProvider.warm_previews())
+
     # Yield control to the application
     yield
 
     # Shutdown: cleanup if needed
+    preview_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await preview_task
+    await AivisSpeechTTSProvider.aclose()
     logger.info("API shutdown complete")
 
 
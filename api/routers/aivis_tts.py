@@ -5,20 +5,38 @@ Provides OpenAI-compatible /v1/audio/speech endpoint
 for integration with Open Notebook's existing TTS infrastructure.
 """
 
+import re
+
 from fastapi import APIRouter, HTTPException, Response
-from pydantic import BaseModel, Field
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, field_validator
 import loguru
 
+from open_notebook.exceptions import EngineUnavailableError, QueueFullError
 from open_notebook.providers.aivis_speech import AivisSpeechTTSProvider
 
 
 router = APIRouter(prefix="/v1/audio", tags=["tts"])
 
+# Seconds clients should wait before retrying while the engine is down
+ENGINE_RETRY_AFTER = "5"
+
+# 5000 code points bounds the UTF-8 payload sent upstream to at most 20000 bytes
+MAX_INPUT_CHARS = 5000
+
+# C0 control characters other than tab, newline and carriage return
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
 
 class SpeechRequest(BaseModel):
     """OpenAI-compatible speech request"""
 
-    input: str = Field(..., description="Text to synthesize")
+    input: str = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_INPUT_CHARS,
+        description="Text to synthesize",
+    )
     model: str = Field(default="aivis-speech", description="Model name (ignored, always AivisSpeech)")
     voice: str = Field(
         default="kohaku_normal",
@@ -26,6 +44,15 @@ class SpeechRequest(BaseModel):
     )
     speed: float = Field(default=1.0, ge=0.5, le=2.0, description="Speech speed")
 
+    @field_validator("input")
+    @classmethod
+    def validate_input(cls, value: str) -> str:
+        if value.isspace():
+            raise ValueError("Input text cannot be empty")
+        if _CONTROL_CHARS.search(value):
+            raise ValueError("Input text contains control characters")
+        return value
+
 
 @router.post("/speech")
 async def create_speech(request: SpeechRequest):
@@ -48,41 +75,93 @@ async def create_speech(request: SpeechRequest):
     - mao_setsunane (まお・せつなめ)
     """
     try:
-        # Validate input
-        if not request.input or len(request.input.strip()) == 0:
-            raise HTTPException(status_code=400, detail="Input text cannot be empty")
-
-        if len(request.input) > 5000:
-            raise HTTPException(status_code=400, detail="Input text too long (max 5000 characters)")
+        loguru.logger.opt(lazy=True).info(
+            "TTS request: voice={voice}, length={length}",
+            voice=lambda: request.voice,
+            length=lambda: len(request.input),
+        )
 
-        loguru.logger.info(f"TTS request: voice={request.voice}, length={len(request.input)}")
+        # WAV is incompressible: ask proxies not to re-encode it
+        headers = {
+            "Content-Disposition": f'attachment; filename="speech_{request.voice}.wav"',
+            "Cache-Control": "no-transform",
+            "X-Model-Used": "aivis-speech",
+            "X-Voice-Used": request.voice,
+        }
 
-        # Synthesize audio
-        audio_data = await AivisSpeechTTSProvider.synthesize(
+        # Cached audio is sent whole so clients get a Content-Length
+        cached = await AivisSpeechTTSProvider.get_cached_audio(
+            text=request.input,
+            voice=request.voice,
+            speed=request.speed,
+        )
+        if cached is not None:
+            return Response(content=cached, media_type="audio/wav", headers=headers)
+
+        # Long input is split into sentences and synthesized in parallel
+        if len(request.input) > AivisSpeechTTSProvider.MAX_CHUNK_CHARS:
+            audio_data = await AivisSpeechTTSProvider.synthesize_long(
+                text=request.input,
+                voice=request.voice,
+                speed=request.speed,
+            )
+            return Response(content=audio_data, media_type="audio/wav", headers=headers)
+
+        # Synthesize audio, streaming chunks to the client as they arrive
+        audio_stream = await AivisSpeechTTSProvider.synthesize_stream(
             text=request.input,
             voice=request.voice,
             speed=request.speed,
         )
 
         # Return WAV audio
-        return Response(
-            content=audio_data,
-            media_type="audio/wav",
-            headers={
-                "Content-Disposition": f'attachment; filename="speech_{request.voice}.wav"',
-                "X-Model-Used": "aivis-speech",
-                "X-Voice-Used": request.voice,
-            },
-        )
+        return StreamingResponse(audio_stream, media_type="audio/wav", headers=headers)
 
     except ValueError as e:
         loguru.logger.error(f"Validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        loguru.logger.warning(f"TTS request rejected: {e}")
+        raise HTTPException(status_code=429, detail="TTS queue full")
+    except EngineUnavailableError as e:
+        loguru.logger.error(f"TTS engine unavailable: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="AivisSpeech engine unavailable",
+            headers={"Retry-After": ENGINE_RETRY_AFTER},
+        )
     except Exception as e:
         loguru.logger.error(f"TTS generation error: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate speech")
 
 
+@router.get("/preview/{voice}")
+async def get_voice_preview(voice: str):
+    """Get a short, cacheable WAV sample of a voice"""
+    try:
+        audio_data = await AivisSpeechTTSProvider.get_preview(voice)
+        return Response(
+            content=audio_data,
+            media_type="audio/wav",
+            headers={"Cache-Control": "public, max-age=86400, immutable"},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueueFullError as e:
+        loguru.logger.warning(f"TTS preview rejected: {e}")
+        raise HTTPException(status_code=429, detail="TTS queue full")
+    except EngineUnavailableError as e:
+        loguru.logger.error(f"TTS engine unavailable: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="AivisSpeech engine unavailable",
+            headers={"Retry-After": ENGINE_RETRY_AFTER},
+        )
+    except Exception as e:
+        loguru.logger.error(f"TTS preview error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to generate preview")
+
+
 @router.get("/voices")
 async def list_voices():
     """List available AivisSpeech voices"""
@@ -92,6 +171,13 @@ async def list_voices():
             "object": "list",
             "data": voices,
         }
+    except EngineUnavailableError as e:
+        loguru.logger.error(f"TTS engine unavailable: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="AivisSpeech engine unavailable",
+            headers={"Retry-After": ENGINE_RETRY_AFTER},
+        )
     except Exception as e:
         loguru.logger.error(f"Failed to list voices: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve voices")
@@ -68,3 +68,15 @@ class NoTranscriptFound(OpenNotebookError):
     """Raised when no transcript is found for a video."""
 
     pass
+
+
+class QueueFullError(OpenNotebookError):
+    """Raised when too many requests are already waiting for a bounded resource."""
+
+    pass
+
+
+class EngineUnavailableError(ExternalServiceError):
+    """Raised when a local engine (e.g., AivisSpeech) cannot be reached."""
+
+    pass
@@ -4,70 +4,510 @@ AivisSpeech TTS Provider for Open Notebook
 Integrates AivisSpeech Engine for Japanese text-to-speech synthesis.
 """
 
+import asyncio
+import hashlib
+import importlib.util
 import os
-from typing import Any, Dict, List, Optional
+import re
+import struct
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
 import httpx
+import orjson
 from loguru import logger
 
+from open_notebook.exceptions import EngineUnavailableError, QueueFullError
+
+# Per-call timeouts: fail fast on connect, allow long reads while the engine renders
+TIMEOUTS = {
+    "default": httpx.Timeout(connect=2.0, read=60.0, write=5.0, pool=5.0),
+    "query": httpx.Timeout(connect=2.0, read=30.0, write=5.0, pool=5.0),
+    "synth": httpx.Timeout(connect=2.0, read=60.0, write=5.0, pool=5.0),
+    "voices": httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=5.0),
+    "health": httpx.Timeout(2.0),
+}
+
+# Transient failures worth retrying; both engine calls are idempotent
+RETRYABLE_ERRORS: Tuple[Type[Exception], ...] = (
+    httpx.ConnectError,
+    httpx.RemoteProtocolError,
+)
+
+# Read timeouts are only retried for the cheap audio_query call: the engine keeps
+# rendering a timed-out /synthesis, so retrying it would stack duplicate work
+QUERY_RETRYABLE_ERRORS = RETRYABLE_ERRORS + (httpx.ReadTimeout,)
+
+# Failures that mean the engine is down rather than misbehaving
+UNREACHABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+async def _post_with_retry(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    retries: int = 2,
+    backoff: float = 0.2,
+    stream: bool = False,
+    retry_on: Tuple[Type[Exception], ...] = RETRYABLE_ERRORS,
+    **kwargs: Any,
+) -> httpx.Response:
+    """POST with exponential backoff on transient connection errors"""
+    request = client.build_request("POST", url, **kwargs)
+    attempt = 0
+    while True:
+        try:
+            return await client.send(request, stream=stream)
+        except retry_on as e:
+            if attempt >= retries:
+                raise
+            delay = backoff * 2**attempt
+            logger.warning(f"AivisSpeech {url} failed ({e!r}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+@lru_cache(maxsize=64)
+def _text_digest(text: str) -> bytes:
+    """SHA-256 of text, memoized so a request's cache probes hash it only once"""
+    # Input is capped at 5000 characters, so hashing takes microseconds and is
+    # cheaper inline than a hop to a worker thread
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+# Sentence boundaries used to split long input into independent synthesis chunks
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[。！？!?\n])")
+
+# Softer boundaries for cutting a sentence that is longer than a chunk
+_SOFT_BOUNDARY = re.compile(r"[、，,.\s]")
+
+
+def _soft_cut(window: str) -> int:
+    """Index just past the last soft boundary in window, or len(window) if none"""
+    cut = 0
+    for match in _SOFT_BOUNDARY.finditer(window):
+        cut = match.end()
+    return cut or len(window)
+
+
+def _split_sentences(text: str, max_chars: int) -> List[str]:
+    """Split text on sentence boundaries into chunks of at most max_chars"""
+    chunks: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        # Wrap sentences that are longer than a chunk on their own, preferring
+        # a comma or space so words are not cut in half
+        while len(sentence) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            cut = _soft_cut(sentence[:max_chars])
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:]
+        if len(current) + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += sentence
+    if current:
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk and not chunk.isspace()]
+
+
+def _split_wav(data: bytes) -> Tuple[bytes, bytes]:
+    """Return the fmt chunk body and PCM data of a RIFF/WAVE file"""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Audio is not a RIFF/WAVE file")
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos : pos + 4]
+        (size,) = struct.unpack_from("<I", data, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt = data[body : body + size]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes fmt chunk")
+            return fmt, data[body : body + size]
+        pos = body + size + (size & 1)
+    raise ValueError("WAV data chunk not found")
+
+
+def _concat_wav(parts: List[bytes]) -> bytes:
+    """Concatenate WAV files with identical formats under a single header"""
+    fmt, first = _split_wav(parts[0])
+    pcm = [first]
+    for part in parts[1:]:
+        part_fmt, part_pcm = _split_wav(part)
+        if part_fmt != fmt:
+            raise ValueError("Cannot concatenate WAV files with different formats")
+        pcm.append(part_pcm)
+
+    data = b"".join(pcm)
+    header = b"".join(
+        [
+            b"RIFF",
+            struct.pack("<I", 4 + 8 + len(fmt) + 8 + len(data)),
+            b"WAVE",
+            b"fmt ",
+            struct.pack("<I", len(fmt)),
+            fmt,
+            b"data",
+            struct.pack("<I", len(data)),
+        ]
+    )
+    return header + data
+
 
 class AivisSpeechTTSProvider:
     """AivisSpeech Engine TTS provider"""
 
     BASE_URL = os.getenv("AIVIS_API_ENDPOINT", "http://127.0.0.1:10101")
 
-    # Speaker mappings for AivisSpeech
-    SPEAKERS = {
-        "mao": {
-            "normal": 888753760,
-            "futsuu": 888753761,
-            "amama": 888753762,
-            "ochitsuki": 888753763,
-            "karakai": 888753764,
-            "setsunane": 888753765,
-        },
-        "kohaku": {
-            "normal": 1878365376,
-            "amama": 1878365377,
-            "setsunane": 1878365378,
-            "nemutai": 1878365379,
-        },
-    }
-
-    @classmethod
-    async def get_available_voices(cls) -> List[Dict[str, Any]]:
-        """Get available voices from AivisSpeech Engine"""
+    # Transport to the engine: "tcp" (HTTP/1.1), "http2", or "uds" (Unix socket)
+    UDS_PATH = os.getenv("AIVIS_UDS_PATH")
+    TRANSPORT = os.getenv("AIVIS_TRANSPORT", "uds" if UDS_PATH else "tcp").lower()
+
+    # Shared HTTP client so keep-alive connections are reused across requests
+    _client: Optional[httpx.AsyncClient] = None
+    _client_lock = asyncio.Lock()
+
+    # LRU cache of synthesized WAV bytes keyed by (sha256(text), voice, speed)
+    CACHE_MAX_ENTRIES = 256
+    CACHE_MAX_BYTES = int(os.getenv("AIVIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    _cache: "OrderedDict[Tuple[bytes, str, float], bytes]" = OrderedDict()
+    _cache_bytes = 0
+    _cache_lock = asyncio.Lock()
+
+    # Bounded concurrency towards the engine, which serializes synthesis internally
+    MAX_CONCURRENCY = int(os.getenv("AIVIS_MAX_CONCURRENCY", "3"))
+    QUEUE_LIMIT = int(os.getenv("AIVIS_QUEUE_LIMIT", "16"))
+    _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    _waiting = 0
+
+    # Inputs longer than this are split and synthesized in parallel
+    MAX_CHUNK_CHARS = 200
+
+    # Short per-voice samples served by the voice picker
+    PREVIEW_TEXT = "こんにちは、サンプルです。"
+    _previews: Dict[str, bytes] = {}
+
+    # Short-lived memoization of engine liveness and the speaker catalog
+    HEALTH_TTL = 5.0
+    VOICES_TTL = 300.0
+    _last_health: float = 0.0
+    _last_health_ok: bool = False
+    _voices: Optional[Tuple[Dict[str, Any], ...]] = None
+    _voices_ts: float = 0.0
+
+    # Speaker mappings for AivisSpeech as flat (speaker, style, style_id) rows
+    _SPEAKERS: Tuple[Tuple[str, str, int], ...] = (
+        ("mao", "normal", 888753760),
+        ("mao", "futsuu", 888753761),
+        ("mao", "amama", 888753762),
+        ("mao", "ochitsuki", 888753763),
+        ("mao", "karakai", 888753764),
+        ("mao", "setsunane", 888753765),
+        ("kohaku", "normal", 1878365376),
+        ("kohaku", "amama", 1878365377),
+        ("kohaku", "setsunane", 1878365378),
+        ("kohaku", "nemutai", 1878365379),
+    )
+
+    # Read-only voice_id -> (speaker, style, style_id) lookup, including "_ja" aliases
+    _VOICE_INDEX: Mapping[str, Tuple[str, str, int]] = MappingProxyType(
+        {
+            f"{speaker}_{style}{suffix}": (speaker, style, style_id)
+            for speaker, style, style_id in _SPEAKERS
+            for suffix in ("", "_ja")
+        }
+    )
+
+    @classmethod
+    def voice_ids(cls) -> List[str]:
+        """List the voice IDs of all configured speaker styles"""
+        return [f"{speaker}_{style}" for speaker, style, _ in cls._SPEAKERS]
+
+    @classmethod
+    def _build_client(cls) -> httpx.AsyncClient:
+        """Create the HTTP client for the configured AIVIS_TRANSPORT"""
+        limits = httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=100,
+            keepalive_expiry=30.0,
+        )
+        transport: Optional[httpx.AsyncHTTPTransport] = None
+        http2 = False
+
+        if cls.TRANSPORT == "uds":
+            if not cls.UDS_PATH:
+                logger.warning(
+                    "AIVIS_TRANSPORT=uds requires AIVIS_UDS_PATH, falling back to TCP"
+                )
+            elif not os.path.exists(cls.UDS_PATH):
+                logger.warning(
+                    f"AIVIS_UDS_PATH '{cls.UDS_PATH}' does not exist, falling back to TCP"
+                )
+            else:
+                transport = httpx.AsyncHTTPTransport(uds=cls.UDS_PATH, limits=limits)
+        elif cls.TRANSPORT == "http2":
+            if importlib.util.find_spec("h2") is not None:
+                http2 = True
+            else:
+                logger.warning(
+                    "AIVIS_TRANSPORT=http2 requires the 'h2' package, falling back to HTTP/1.1"
+                )
+        elif cls.TRANSPORT != "tcp":
+            logger.warning(f"Unknown AIVIS_TRANSPORT '{cls.TRANSPORT}', using TCP")
+
+        return httpx.AsyncClient(
+            base_url=cls.BASE_URL,
+            limits=limits,
+            timeout=TIMEOUTS["default"],
+            http2=http2,
+            transport=transport,
+        )
+
+    @classmethod
+    async def _get_client(cls) -> httpx.AsyncClient:
+        """Return the shared pooled HTTP client, creating it on first use"""
+        if cls._client is None or cls._client.is_closed:
+            async with cls._client_lock:
+                if cls._client is None or cls._client.is_closed:
+                    cls._client = cls._build_client()
+        return cls._client
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared HTTP client"""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    @classmethod
+    async def get_available_voices(cls) -> Tuple[Dict[str, Any], ...]:
+        """
+        Get available voices from AivisSpeech Engine
+
+        Raises:
+            EngineUnavailableError: If the engine cannot be reached
+            httpx.HTTPError: If API request fails
+        """
+        # The speaker catalog is static for the lifetime of an engine process
+        if cls._voices is not None and time.monotonic() - cls._voices_ts < cls.VOICES_TTL:
+            return cls._voices
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{cls.BASE_URL}/speakers", timeout=10.0)
-                response.raise_for_status()
-                speakers = response.json()
-
-                voices = []
-                for speaker in speakers:
-                    for style in speaker.get("styles", []):
-                        voices.append({
-                            "id": f"{speaker['name']}_{style['name']}",
-                            "name": style["name"],
-                            "speaker": speaker["name"],
-                            "style_id": style["id"],
-                        })
-
-                logger.info(f"Found {len(voices)} voices in AivisSpeech")
-                return voices
+            client = await cls._get_client()
+            response = await client.get("/speakers", timeout=TIMEOUTS["voices"])
+            response.raise_for_status()
+            speakers = orjson.loads(response.content)
+
+            # Shaped once per TTL as a tuple so callers cannot grow the cache
+            voices = tuple(
+                {
+                    "id": f"{speaker['name']}_{style['name']}",
+                    "name": style["name"],
+                    "speaker": speaker["name"],
+                    "style_id": style["id"],
+                }
+                for speaker in speakers
+                for style in speaker.get("styles", [])
+            )
 
+            logger.info("Found {} voices in AivisSpeech", len(voices))
+            cls._voices = voices
+            cls._voices_ts = time.monotonic()
+            return voices
+
+        except UNREACHABLE_ERRORS as e:
+            logger.error(f"AivisSpeech engine unreachable: {e}")
+            raise EngineUnavailableError("AivisSpeech engine unavailable") from e
         except Exception as e:
             logger.error(f"Failed to get AivisSpeech voices: {e}")
-            return []
+            raise
 
     @classmethod
-    def parse_voice_id(cls, voice_id: str) -> Optional[tuple[str, str]]:
-        """Parse voice_id into speaker and style"""
+    def parse_voice_id(cls, voice_id: str) -> Optional[Tuple[str, str, int]]:
+        """Parse voice_id into speaker, style and style_id"""
         # Expected format: "speaker_style" or "speaker_style_ja"
-        for speaker_name, styles in cls.SPEAKERS.items():
-            for style_name in styles.keys():
-                if voice_id.startswith(f"{speaker_name}_{style_name}"):
-                    return speaker_name, style_name
-        return None
+        return cls._VOICE_INDEX.get(voice_id)
+
+    @staticmethod
+    def _cache_key(text: str, voice: str, speed: float) -> Tuple[bytes, str, float]:
+        """Build the audio cache key for a synthesis request"""
+        return _text_digest(text), voice, round(speed, 3)
+
+    @classmethod
+    async def _cache_get(cls, key: Tuple[bytes, str, float]) -> Optional[bytes]:
+        """Return cached audio for key, marking it as most recently used"""
+        async with cls._cache_lock:
+            audio_data = cls._cache.get(key)
+            if audio_data is not None:
+                cls._cache.move_to_end(key)
+            return audio_data
+
+    @classmethod
+    async def get_cached_audio(
+        cls,
+        text: str,
+        voice: str = "kohaku_normal",
+        speed: float = 1.0,
+    ) -> Optional[bytes]:
+        """Return previously synthesized audio for this request, if cached"""
+        parsed = cls.parse_voice_id(voice)
+        if not parsed:
+            return None
+        speaker_name, style_name, _ = parsed
+        return await cls._cache_get(
+            cls._cache_key(text, f"{speaker_name}_{style_name}", speed)
+        )
+
+    @classmethod
+    async def _cache_put(cls, key: Tuple[bytes, str, float], audio_data: bytes) -> None:
+        """Store audio for key, evicting least recently used entries over the caps"""
+        if cls.CACHE_MAX_BYTES <= 0 or len(audio_data) > cls.CACHE_MAX_BYTES:
+            return
+        async with cls._cache_lock:
+            previous = cls._cache.pop(key, None)
+            if previous is not None:
+                cls._cache_bytes -= len(previous)
+            cls._cache[key] = audio_data
+            cls._cache_bytes += len(audio_data)
+            while (
+                len(cls._cache) > cls.CACHE_MAX_ENTRIES
+                or cls._cache_bytes > cls.CACHE_MAX_BYTES
+            ):
+                _, evicted = cls._cache.popitem(last=False)
+                cls._cache_bytes -= len(evicted)
+
+    @classmethod
+    async def _acquire_engine_slot(cls) -> None:
+        """Wait for an engine slot, or raise QueueFullError if the queue is full"""
+        if cls._waiting >= cls.QUEUE_LIMIT:
+            raise QueueFullError(
+                f"AivisSpeech queue is full ({cls._waiting} requests waiting)"
+            )
+        cls._waiting += 1
+        try:
+            await cls._semaphore.acquire()
+        finally:
+            cls._waiting -= 1
+
+    @classmethod
+    def _resolve_voice(cls, voice: str) -> Tuple[str, str, int]:
+        """Resolve voice_id to (speaker, style, style_id) or raise ValueError"""
+        parsed = cls.parse_voice_id(voice)
+        if not parsed:
+            raise ValueError(
+                f"Invalid voice_id '{voice}'. "
+                f"Expected format: 'speaker_style' (e.g., 'kohaku_normal')"
+            )
+        return parsed
+
+    @classmethod
+    async def _create_audio_query(
+        cls,
+        client: httpx.AsyncClient,
+        text: str,
+        style_id: int,
+        speed: float,
+    ) -> bytes:
+        """Create an AudioQuery and return it as a JSON body for /synthesis"""
+        query_params = {"speaker": style_id, "text": text}
+        query_response = await _post_with_retry(
+            client,
+            "/audio_query",
+            retry_on=QUERY_RETRYABLE_ERRORS,
+            params=query_params,
+            timeout=TIMEOUTS["query"],
+        )
+        query_response.raise_for_status()
+
+        # At default speed the query is forwarded verbatim; otherwise only
+        # speedScale is rewritten.
+        if speed == 1.0:
+            return query_response.content
+
+        audio_query = orjson.loads(query_response.content)
+        audio_query["speedScale"] = speed
+        return orjson.dumps(audio_query)
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def _voice_params(cls, voice: str) -> Tuple[str, int, Dict[str, int]]:
+        """
+        Resolve a voice once into (voice_key, style_id, /synthesis params)
+
+        voice_key is the canonical "speaker_style" id, so aliases share cache
+        entries. Invalid voices raise ValueError and are not memoized.
+        """
+        speaker_name, style_name, style_id = cls._resolve_voice(voice)
+        return f"{speaker_name}_{style_name}", style_id, {"speaker": style_id}
+
+    @classmethod
+    async def _request_synthesis(
+        cls,
+        text: str,
+        style_id: int,
+        params: Dict[str, int],
+        speed: float,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        Run audio_query and /synthesis under an engine slot
+
+        The slot is released once the synthesis response headers arrive; the
+        engine renders the whole utterance before responding. With
+        stream=True the caller owns the returned response and must close it.
+        """
+        await cls._acquire_engine_slot()
+        try:
+            client = await cls._get_client()
+
+            # Step 1: Create AudioQuery
+            synth_body = await cls._create_audio_query(client, text, style_id, speed)
+
+            # Step 2: Synthesize audio (reuses the same pooled connection)
+            synth_response = await _post_with_retry(
+                client,
+                "/synthesis",
+                stream=stream,
+                params=params,
+                content=synth_body,
+                headers={"Content-Type": "application/json"},
+                timeout=TIMEOUTS["synth"],
+            )
+            try:
+                synth_response.raise_for_status()
+            except httpx.HTTPError:
+                await synth_response.aclose()
+                raise
+            return synth_response
+
+        except UNREACHABLE_ERRORS as e:
+            logger.error(f"AivisSpeech engine unreachable: {e}")
+            raise EngineUnavailableError("AivisSpeech engine unavailable") from e
+        except httpx.HTTPError as e:
+            logger.error(f"AivisSpeech API error: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error during synthesis: {e}")
+            raise
+        finally:
+            cls._semaphore.release()
 
     @classmethod
     async def synthesize(
@@ -89,66 +529,210 @@ class AivisSpeechTTSProvider:
 
         Raises:
             ValueError: If voice_id is invalid
+            QueueFullError: If too many requests are waiting for the engine
+            EngineUnavailableError: If the engine cannot be reached
             httpx.HTTPError: If API request fails
         """
-        # Parse voice_id
-        parsed = cls.parse_voice_id(voice)
-        if not parsed:
-            raise ValueError(
-                f"Invalid voice_id '{voice}'. "
-                f"Expected format: 'speaker_style' (e.g., 'kohaku_normal')"
-            )
+        voice_key, style_id, params = cls._voice_params(voice)
+
+        cache_key = cls._cache_key(text, voice_key, speed)
+        cached = await cls._cache_get(cache_key)
+        if cached is not None:
+            logger.debug("Serving {} bytes of cached audio", len(cached))
+            return cached
+
+        logger.info("Synthesizing with {}, style_id={}", voice_key, style_id)
+
+        synth_response = await cls._request_synthesis(text, style_id, params, speed)
+        audio_data = synth_response.content
+        logger.debug("Synthesized {} bytes of audio", len(audio_data))
+        await cls._cache_put(cache_key, audio_data)
+        return audio_data
+
+    @classmethod
+    async def synthesize_stream(
+        cls,
+        text: str,
+        voice: str = "kohaku_normal",
+        speed: float = 1.0,
+        chunk_size: int = 65536,
+    ) -> AsyncIterator[bytes]:
+        """
+        Synthesize speech and stream the WAV bytes as the engine produces them
+
+        The audio query and the synthesis response status are resolved before
+        this coroutine returns, so engine errors are raised here rather than
+        truncating the stream. The engine emits a single contiguous WAV, which
+        is forwarded unmodified.
+
+        Args:
+            text: Input text to synthesize
+            voice: Voice ID in format "speaker_style" (e.g., "kohaku_normal")
+            speed: Speech speed (0.5 to 2.0)
+            chunk_size: Maximum size of each yielded chunk in bytes
+
+        Returns:
+            Async iterator over audio data chunks (WAV format)
+
+        Raises:
+            ValueError: If voice_id is invalid
+            QueueFullError: If too many requests are waiting for the engine
+            EngineUnavailableError: If the engine cannot be reached
+            httpx.HTTPError: If API request fails
+        """
+        voice_key, style_id, params = cls._voice_params(voice)
+
+        cache_key = cls._cache_key(text, voice_key, speed)
+        cached = await cls._cache_get(cache_key)
+        if cached is not None:
+            logger.debug("Serving {} bytes of cached audio", len(cached))
+
+            async def iter_cached() -> AsyncIterator[bytes]:
+                yield cached
+
+            return iter_cached()
+
+        logger.info("Streaming synthesis with {}, style_id={}", voice_key, style_id)
+
+        synth_response = await cls._request_synthesis(
+            text, style_id, params, speed, stream=True
+        )
 
-        speaker_name, style_name = parsed
-        style_id = cls.SPEAKERS[speaker_name][style_name]
+        async def iter_audio() -> AsyncIterator[bytes]:
+            # Chunks are retained only while the total still fits in the cache
+            chunks: List[bytes] = []
+            size = 0
+            try:
+                async for chunk in synth_response.aiter_bytes(chunk_size):
+                    size += len(chunk)
+                    if size <= cls.CACHE_MAX_BYTES:
+                        chunks.append(chunk)
+                    yield chunk
+            finally:
+                await synth_response.aclose()
 
-        logger.info(f"Synthesizing with {speaker_name} ({style_name}), style_id={style_id}")
+            logger.debug("Streamed {} bytes of audio", size)
+            if size <= cls.CACHE_MAX_BYTES:
+                await cls._cache_put(cache_key, b"".join(chunks))
 
+        return iter_audio()
+
+    @classmethod
+    async def synthesize_long(
+        cls,
+        text: str,
+        voice: str = "kohaku_normal",
+        speed: float = 1.0,
+    ) -> bytes:
+        """
+        Synthesize long text as parallel sentence chunks joined into one WAV
+
+        Args:
+            text: Input text to synthesize
+            voice: Voice ID in format "speaker_style" (e.g., "kohaku_normal")
+            speed: Speech speed (0.5 to 2.0)
+
+        Returns:
+            Audio data as bytes (WAV format)
+
+        Raises:
+            ValueError: If voice_id is invalid
+            QueueFullError: If too many requests are waiting for the engine
+            EngineUnavailableError: If the engine cannot be reached
+            httpx.HTTPError: If API request fails
+        """
+        voice_key, _, _ = cls._voice_params(voice)
+
+        chunks = _split_sentences(text, cls.MAX_CHUNK_CHARS)
+        if len(chunks) <= 1:
+            return await cls.synthesize(text, voice=voice_key, speed=speed)
+
+        cache_key = cls._cache_key(text, voice_key, speed)
+        cached = await cls._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Keep this request's own queue footprint within the engine slots so a
+        # single long input cannot trip the queue limit by itself
+        local_slots = asyncio.Semaphore(cls.MAX_CONCURRENCY)
+
+        async def synthesize_chunk(chunk: str) -> bytes:
+            async with local_slots:
+                return await cls.synthesize(chunk, voice=voice_key, speed=speed)
+
+        # A TaskGroup cancels the remaining chunks as soon as one fails, so the
+        # engine is not left rendering audio for a request that already errored
         try:
-            async with httpx.AsyncClient() as client:
-                # Step 1: Create AudioQuery
-                query_params = {"speaker": style_id, "text": text}
-                query_response = await client.post(
-                    f"{cls.BASE_URL}/audio_query",
-                    params=query_params,
-                    timeout=30.0,
-                )
-                query_response.raise_for_status()
-                audio_query = query_response.json()
-
-                # Adjust speed if needed
-                if speed != 1.0:
-                    audio_query["speedScale"] = speed
-
-                # Step 2: Synthesize audio
-                synth_response = await client.post(
-                    f"{cls.BASE_URL}/synthesis",
-                    params={"speaker": style_id},
-                    json=audio_query,
-                    timeout=60.0,
-                )
-                synth_response.raise_for_status()
+            async with asyncio.TaskGroup() as group:
+                tasks = [group.create_task(synthesize_chunk(chunk)) for chunk in chunks]
+        except BaseExceptionGroup as e:
+            raise e.exceptions[0]
 
-                audio_data = synth_response.content
-                logger.info(f"Synthesized {len(audio_data)} bytes of audio")
-                return audio_data
+        parts = [task.result() for task in tasks]
+        logger.debug("Synthesized {} chunks for {} characters", len(parts), len(text))
+        audio_data = _concat_wav(parts)
+        # Cache the joined audio under the full text so a repeat request hits
+        # the router's cache probe instead of reassembling the chunks
+        await cls._cache_put(cache_key, audio_data)
+        return audio_data
 
-        except httpx.HTTPError as e:
-            logger.error(f"AivisSpeech API error: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error during synthesis: {e}")
-            raise
+    @classmethod
+    async def get_preview(cls, voice: str) -> bytes:
+        """
+        Get the preview sample for a voice, synthesizing it on first use
+
+        Raises:
+            ValueError: If voice_id is invalid
+            QueueFullError: If too many requests are waiting for the engine
+            EngineUnavailableError: If the engine cannot be reached
+            httpx.HTTPError: If API request fails
+        """
+        voice_key, style_id, params = cls._voice_params(voice)
+
+        preview = cls._previews.get(voice_key)
+        if preview is None:
+            # Previews are kept only in _previews, not duplicated in the LRU
+            synth_response = await cls._request_synthesis(
+                cls.PREVIEW_TEXT, style_id, params, 1.0
+            )
+            preview = synth_response.content
+            cls._previews[voice_key] = preview
+        return preview
+
+    @classmethod
+    async def warm_previews(cls) -> None:
+        """Prebake preview samples for every configured voice (failures are non-fatal)"""
+        if not await cls.health_check():
+            logger.info("AivisSpeech engine not reachable, skipping voice preview warm-up")
+            return
+
+        # One at a time, so warm-up holds at most one engine slot and never
+        # crowds real /speech traffic out of the queue
+        for voice in cls.voice_ids():
+            try:
+                await cls.get_preview(voice)
+            except Exception as e:
+                logger.warning(f"Failed to prebake AivisSpeech preview for {voice}: {e}")
+        logger.info(f"Prebaked {len(cls._previews)} AivisSpeech voice previews")
 
     @classmethod
     async def health_check(cls) -> bool:
         """Check if AivisSpeech Engine is accessible"""
+        # Debounce probe storms and use the lightweight /version endpoint
+        now = time.monotonic()
+        if now - cls._last_health < cls.HEALTH_TTL:
+            return cls._last_health_ok
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{cls.BASE_URL}/speakers", timeout=5.0)
-                return response.status_code == 200
+            client = await cls._get_client()
+            response = await client.get("/version", timeout=TIMEOUTS["health"])
+            is_healthy = response.status_code == 200
         except Exception:
-            return False
+            is_healthy = False
+
+        cls._last_health = now
+        cls._last_health_ok = is_healthy
+        return is_healthy
 
 
 # Helper function for OpenAI-compatible API
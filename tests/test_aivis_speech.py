@@ -0,0 +1,898 @@
+"""
+Unit tests for the AivisSpeech TTS provider.
+
+These tests cover the provider's local logic (voice parsing, caching) and do
+not require a running AivisSpeech Engine.
+"""
+
+import asyncio
+import io
+import wave
+from collections import OrderedDict
+
+import httpx
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from api.routers.aivis_tts import SpeechRequest
+from open_notebook.exceptions import EngineUnavailableError, QueueFullError
+from open_notebook.providers.aivis_speech import (
+    AivisSpeechTTSProvider,
+    _concat_wav,
+    _post_with_retry,
+    _split_sentences,
+)
+
+
+def _make_wav(frames: int, framerate: int = 24000) -> bytes:
+    """Build a mono 16-bit PCM WAV with the given number of frames."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(framerate)
+        wav.writeframes(b"\x01\x00" * frames)
+    return buffer.getvalue()
+
+
+def _engine_handler(calls, audio=None):
+    """Build a MockTransport handler that emulates the engine endpoints."""
+    audio = audio if audio is not None else _make_wav(10)
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/audio_query":
+            return httpx.Response(200, content=b'{"speedScale": 1.0}')
+        if request.url.path == "/synthesis":
+            return httpx.Response(200, content=audio)
+        if request.url.path == "/version":
+            return httpx.Response(200, json="1.0.0")
+        return httpx.Response(404)
+
+    return handler
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    """Give the provider an empty audio cache for the duration of a test."""
+    monkeypatch.setattr(AivisSpeechTTSProvider, "_cache", OrderedDict())
+    monkeypatch.setattr(AivisSpeechTTSProvider, "_cache_bytes", 0)
+
+
+@pytest.fixture
+def mock_engine(monkeypatch):
+    """Install a MockTransport-backed client as the provider's shared client."""
+
+    def install(handler):
+        client = httpx.AsyncClient(
+            base_url="http://engine", transport=httpx.MockTransport(handler)
+        )
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_client", client)
+        return client
+
+    return install
+
+
+# ============================================================================
+# TEST SUITE 1: Voice ID Parsing
+# ============================================================================
+
+
+class TestVoiceIdParsing:
+    """Test suite for voice_id resolution."""
+
+    def test_parse_known_voice(self):
+        """Test that a known voice resolves to speaker, style and style_id."""
+        assert AivisSpeechTTSProvider.parse_voice_id("kohaku_normal") == (
+            "kohaku",
+            "normal",
+            1878365376,
+        )
+
+    def test_parse_ja_alias(self):
+        """Test that the "_ja" suffix resolves to the same voice."""
+        assert AivisSpeechTTSProvider.parse_voice_id(
+            "mao_amama_ja"
+        ) == AivisSpeechTTSProvider.parse_voice_id("mao_amama")
+
+    def test_parse_rejects_prefix_matches(self):
+        """Test that only exact voice ids are accepted."""
+        assert AivisSpeechTTSProvider.parse_voice_id("kohaku_normal_longer") is None
+        assert AivisSpeechTTSProvider.parse_voice_id("kohaku") is None
+        assert AivisSpeechTTSProvider.parse_voice_id("") is None
+
+    def test_every_speaker_style_is_indexed(self):
+        """Test that every configured speaker style can be parsed."""
+        for speaker, style, style_id in AivisSpeechTTSProvider._SPEAKERS:
+            assert AivisSpeechTTSProvider.parse_voice_id(f"{speaker}_{style}") == (
+                speaker,
+                style,
+                style_id,
+            )
+
+    def test_voice_ids(self):
+        """Test that voice_ids lists each configured style once."""
+        voice_ids = AivisSpeechTTSProvider.voice_ids()
+
+        assert len(voice_ids) == len(AivisSpeechTTSProvider._SPEAKERS)
+        assert "kohaku_normal" in voice_ids
+        assert "mao_setsunane" in voice_ids
+
+    def test_voice_index_is_read_only(self):
+        """Test that the voice index cannot be mutated at runtime."""
+        with pytest.raises(TypeError):
+            AivisSpeechTTSProvider._VOICE_INDEX["kohaku_normal"] = ("x", "y", 0)
+
+
+# ============================================================================
+# TEST SUITE 2: Client Transport Selection
+# ============================================================================
+
+
+class TestClientTransport:
+    """Test suite for AIVIS_TRANSPORT handling in _build_client."""
+
+    @pytest.fixture
+    def built(self, monkeypatch):
+        """Capture the keyword arguments passed to httpx.AsyncClient."""
+        captured = {}
+
+        def fake_client(**kwargs):
+            captured.update(kwargs)
+            return kwargs
+
+        monkeypatch.setattr("httpx.AsyncClient", fake_client)
+
+        def build(transport, uds_path=None):
+            monkeypatch.setattr(AivisSpeechTTSProvider, "TRANSPORT", transport)
+            monkeypatch.setattr(AivisSpeechTTSProvider, "UDS_PATH", uds_path)
+            AivisSpeechTTSProvider._build_client()
+            return captured
+
+        return build
+
+    def test_tcp(self, built):
+        """Test that tcp uses the default transport over HTTP/1.1."""
+        kwargs = built("tcp")
+        assert kwargs["transport"] is None
+        assert kwargs["http2"] is False
+
+    def test_uds_with_existing_socket(self, built, tmp_path):
+        """Test that uds connects through the configured socket path."""
+        socket_path = tmp_path / "aivis.sock"
+        socket_path.touch()
+
+        kwargs = built("uds", str(socket_path))
+
+        assert isinstance(kwargs["transport"], httpx.AsyncHTTPTransport)
+        assert kwargs["transport"]._pool._uds == str(socket_path)
+
+    def test_uds_missing_socket_falls_back_to_tcp(self, built, tmp_path):
+        """Test that a missing socket file falls back to TCP."""
+        kwargs = built("uds", str(tmp_path / "missing.sock"))
+        assert kwargs["transport"] is None
+
+    def test_uds_without_path_falls_back_to_tcp(self, built):
+        """Test that uds without AIVIS_UDS_PATH falls back to TCP."""
+        kwargs = built("uds")
+        assert kwargs["transport"] is None
+
+    def test_http2_with_h2_installed(self, built, monkeypatch):
+        """Test that http2 is enabled when the h2 package is available."""
+        monkeypatch.setattr("importlib.util.find_spec", lambda name: object())
+        kwargs = built("http2")
+        assert kwargs["http2"] is True
+
+    def test_http2_without_h2_falls_back(self, built, monkeypatch):
+        """Test that http2 falls back to HTTP/1.1 without the h2 package."""
+        monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+        kwargs = built("http2")
+        assert kwargs["http2"] is False
+
+    def test_unknown_value_uses_tcp(self, built):
+        """Test that an unknown transport value falls back to TCP."""
+        kwargs = built("carrier-pigeon")
+        assert kwargs["transport"] is None
+        assert kwargs["http2"] is False
+
+
+# ============================================================================
+# TEST SUITE 3: Engine Concurrency
+# ============================================================================
+
+
+class TestEngineConcurrency:
+    """Test suite for the bounded engine queue."""
+
+    @pytest.mark.asyncio
+    async def test_full_queue_is_rejected(self, monkeypatch):
+        """Test that requests beyond the queue limit raise QueueFullError."""
+        monkeypatch.setattr(
+            AivisSpeechTTSProvider, "_waiting", AivisSpeechTTSProvider.QUEUE_LIMIT
+        )
+
+        with pytest.raises(QueueFullError):
+            await AivisSpeechTTSProvider.synthesize("こんにちは", voice="kohaku_normal")
+
+
+# ============================================================================
+# TEST SUITE 4: Speech Request Validation
+# ============================================================================
+
+
+class TestSpeechRequestValidation:
+    """Test suite for /v1/audio/speech input validation."""
+
+    def test_valid_input(self):
+        """Test that normal Japanese text with newlines is accepted."""
+        request = SpeechRequest(input="こんにちは。\n今日はいい天気です。")
+        assert request.input == "こんにちは。\n今日はいい天気です。"
+
+    @pytest.mark.parametrize("text", ["", "   ", "\n\t"])
+    def test_empty_input_rejected(self, text):
+        """Test that empty and whitespace-only input is rejected."""
+        with pytest.raises(ValidationError):
+            SpeechRequest(input=text)
+
+    def test_too_long_input_rejected(self):
+        """Test that input over 5000 characters is rejected."""
+        with pytest.raises(ValidationError):
+            SpeechRequest(input="あ" * 5001)
+
+    def test_control_characters_rejected(self):
+        """Test that control characters are rejected."""
+        with pytest.raises(ValidationError):
+            SpeechRequest(input="hello\x00world")
+
+
+# ============================================================================
+# TEST SUITE 5: Retries
+# ============================================================================
+
+
+class TestPostWithRetry:
+    """Test suite for transient-error retries against the engine."""
+
+    @pytest.mark.asyncio
+    async def test_retries_connect_error(self):
+        """Test that a transient connect error is retried."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                raise httpx.ConnectError("engine restarting", request=request)
+            return httpx.Response(200, content=b"ok")
+
+        async with httpx.AsyncClient(
+            base_url="http://engine", transport=httpx.MockTransport(handler)
+        ) as client:
+            response = await _post_with_retry(client, "/audio_query", backoff=0)
+
+        assert response.content == b"ok"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retries(self):
+        """Test that the last error is raised once retries are exhausted."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ConnectError("engine down", request=request)
+
+        async with httpx.AsyncClient(
+            base_url="http://engine", transport=httpx.MockTransport(handler)
+        ) as client:
+            with pytest.raises(httpx.ConnectError):
+                await _post_with_retry(client, "/audio_query", retries=2, backoff=0)
+
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_synthesis_read_timeout_not_retried(self, mock_engine, fresh_cache):
+        """Test that a /synthesis read timeout is not resent to a busy engine."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if request.url.path == "/audio_query":
+                return httpx.Response(200, content=b"{}")
+            raise httpx.ReadTimeout("engine busy", request=request)
+
+        mock_engine(handler)
+
+        with pytest.raises(httpx.ReadTimeout):
+            await AivisSpeechTTSProvider.synthesize("タイムアウト", voice="mao_normal")
+
+        assert calls == ["/audio_query", "/synthesis"]
+
+    @pytest.mark.asyncio
+    async def test_audio_query_read_timeout_retried(self, mock_engine, fresh_cache):
+        """Test that an /audio_query read timeout is retried."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if request.url.path == "/audio_query" and len(calls) == 1:
+                raise httpx.ReadTimeout("slow query", request=request)
+            return _engine_handler([])(request)
+
+        mock_engine(handler)
+
+        await AivisSpeechTTSProvider.synthesize("再試行", voice="mao_normal")
+
+        assert calls == ["/audio_query", "/audio_query", "/synthesis"]
+
+
+# ============================================================================
+# TEST SUITE 6: Engine Availability
+# ============================================================================
+
+
+class TestEngineUnavailable:
+    """Test suite for surfacing an unreachable engine."""
+
+    @pytest.mark.asyncio
+    async def test_unreachable_engine_raises(self, monkeypatch):
+        """Test that connection failures raise EngineUnavailableError."""
+
+        def handler(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        client = httpx.AsyncClient(
+            base_url="http://engine", transport=httpx.MockTransport(handler)
+        )
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_client", client)
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_voices", None)
+
+        with pytest.raises(EngineUnavailableError):
+            await AivisSpeechTTSProvider.synthesize("接続テスト", voice="mao_normal")
+        with pytest.raises(EngineUnavailableError):
+            await AivisSpeechTTSProvider.get_available_voices()
+
+        await client.aclose()
+
+
+# ============================================================================
+# TEST SUITE 7: Long Text Splitting and WAV Concatenation
+# ============================================================================
+
+
+class TestLongTextSynthesis:
+    """Test suite for splitting long input and joining the audio."""
+
+    def test_split_on_sentence_boundaries(self):
+        """Test that chunks end on sentence boundaries and preserve the text."""
+        text = "今日は晴れです。" * 40
+        chunks = _split_sentences(text, 200)
+
+        assert "".join(chunks) == text
+        assert all(len(chunk) <= 200 for chunk in chunks)
+        assert all(chunk.endswith("。") for chunk in chunks)
+
+    def test_split_hard_wraps_long_sentences(self):
+        """Test that a sentence longer than a chunk is wrapped."""
+        text = "あ" * 450
+        chunks = _split_sentences(text, 200)
+
+        assert [len(chunk) for chunk in chunks] == [200, 200, 50]
+
+    def test_split_prefers_soft_boundaries(self):
+        """Test that long runs without sentence enders are cut between words."""
+        text = "This is an English sentence. " * 10
+        chunks = _split_sentences(text, 200)
+
+        assert "".join(chunks) == text
+        assert all(len(chunk) <= 200 for chunk in chunks)
+        # Every cut falls after a space, never inside a word
+        assert all(chunk.endswith(" ") for chunk in chunks)
+        words = {"This", "is", "an", "English", "sentence."}
+        assert all(set(chunk.split()) <= words for chunk in chunks)
+
+    def test_split_prefers_japanese_commas(self):
+        """Test that a long Japanese clause is cut after a reading comma."""
+        text = "あ" * 150 + "、" + "い" * 100
+        chunks = _split_sentences(text, 200)
+
+        assert chunks == ["あ" * 150 + "、", "い" * 100]
+
+    def test_split_drops_whitespace_only_chunks(self):
+        """Test that blank lines do not become synthesis requests."""
+        assert _split_sentences("あああ\n\n\n", 3) == ["あああ"]
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_cancels_siblings(
+        self, monkeypatch, mock_engine, fresh_cache
+    ):
+        """Test that one failing chunk cancels the chunks still in flight."""
+        semaphore = asyncio.Semaphore(3)
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_semaphore", semaphore)
+        monkeypatch.setattr(AivisSpeechTTSProvider, "MAX_CHUNK_CHARS", 5)
+        cancelled = []
+
+        async def handler(request):
+            if request.url.path == "/audio_query":
+                return httpx.Response(200, json={"text": request.url.params["text"]})
+            text = orjson.loads(request.content)["text"]
+            if "失敗" in text:
+                return httpx.Response(500, content=b"engine error")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(text)
+                raise
+            return httpx.Response(200, content=_make_wav(10))
+
+        mock_engine(handler)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await AivisSpeechTTSProvider.synthesize_long(
+                "いち。に失敗。さん。", voice="mao_normal"
+            )
+
+        assert sorted(cancelled) == sorted(["いち。", "さん。"])
+        assert not semaphore.locked()
+
+    @pytest.mark.asyncio
+    async def test_joined_audio_is_cached(self, monkeypatch, mock_engine, fresh_cache):
+        """Test that the joined WAV is cached under the full input text."""
+        monkeypatch.setattr(AivisSpeechTTSProvider, "MAX_CHUNK_CHARS", 5)
+        calls = []
+        mock_engine(_engine_handler(calls))
+        text = "いち。に。さん。"
+
+        audio = await AivisSpeechTTSProvider.synthesize_long(text, voice="mao_normal")
+        synthesized = len(calls)
+
+        assert (
+            await AivisSpeechTTSProvider.get_cached_audio(text, "mao_normal", 1.0)
+            == audio
+        )
+        assert (
+            await AivisSpeechTTSProvider.synthesize_long(text, voice="mao_normal")
+            == audio
+        )
+        assert len(calls) == synthesized
+
+    def test_concat_wav(self):
+        """Test that WAV parts are joined under one valid header."""
+        joined = _concat_wav([_make_wav(10), _make_wav(20), _make_wav(5)])
+
+        with wave.open(io.BytesIO(joined)) as wav:
+            assert wav.getnframes() == 35
+            assert wav.getframerate() == 24000
+
+    def test_concat_wav_rejects_mismatched_formats(self):
+        """Test that parts with different formats are not joined."""
+        with pytest.raises(ValueError):
+            _concat_wav([_make_wav(10, 24000), _make_wav(10, 44100)])
+
+
+# ============================================================================
+# TEST SUITE 8: Voice Previews
+# ============================================================================
+
+
+class TestVoicePreviews:
+    """Test suite for prebaked voice previews."""
+
+    @pytest.mark.asyncio
+    async def test_prebaked_preview_is_served(self, monkeypatch):
+        """Test that a stored preview is returned without synthesis."""
+        preview = _make_wav(10)
+        monkeypatch.setattr(
+            AivisSpeechTTSProvider, "_previews", {"kohaku_normal": preview}
+        )
+
+        assert await AivisSpeechTTSProvider.get_preview("kohaku_normal_ja") == preview
+
+    @pytest.mark.asyncio
+    async def test_warm_previews_one_at_a_time(
+        self, monkeypatch, mock_engine, fresh_cache
+    ):
+        """Test that warm-up synthesizes sequentially and bypasses the LRU."""
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_previews", {})
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_last_health", float("-inf"))
+        in_flight = 0
+        max_in_flight = 0
+        engine = _engine_handler([])
+
+        async def handler(request):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return engine(request)
+
+        mock_engine(handler)
+
+        await AivisSpeechTTSProvider.warm_previews()
+
+        assert max_in_flight == 1
+        assert set(AivisSpeechTTSProvider._previews) == set(
+            AivisSpeechTTSProvider.voice_ids()
+        )
+        assert len(AivisSpeechTTSProvider._cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_voice_preview_rejected(self):
+        """Test that previews for unknown voices raise ValueError."""
+        with pytest.raises(ValueError):
+            await AivisSpeechTTSProvider.get_preview("nobody_normal")
+
+
+# ============================================================================
+# TEST SUITE 9: Audio Cache
+# ============================================================================
+
+
+def _key(text: str, voice: str = "kohaku_normal"):
+    return AivisSpeechTTSProvider._cache_key(text, voice, 1.0)
+
+
+@pytest.mark.usefixtures("fresh_cache")
+class TestAudioCache:
+    """Test suite for the synthesized audio LRU cache."""
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used_over_entry_cap(self, monkeypatch):
+        """Test that the entry cap evicts the least recently used entry."""
+        monkeypatch.setattr(AivisSpeechTTSProvider, "CACHE_MAX_ENTRIES", 2)
+
+        await AivisSpeechTTSProvider._cache_put(_key("a"), b"aa")
+        await AivisSpeechTTSProvider._cache_put(_key("b"), b"bb")
+        # Touch "a" so "b" becomes the least recently used entry
+        assert await AivisSpeechTTSProvider._cache_get(_key("a")) == b"aa"
+        await AivisSpeechTTSProvider._cache_put(_key("c"), b"cc")
+
+        assert await AivisSpeechTTSProvider._cache_get(_key("b")) is None
+        assert await AivisSpeechTTSProvider._cache_get(_key("a")) == b"aa"
+        assert await AivisSpeechTTSProvider._cache_get(_key("c")) == b"cc"
+        assert AivisSpeechTTSProvider._cache_bytes == 4
+
+    @pytest.mark.asyncio
+    async def test_evicts_over_byte_cap(self, monkeypatch):
+        """Test that the byte cap evicts oldest entries until under budget."""
+        monkeypatch.setattr(AivisSpeechTTSProvider, "CACHE_MAX_BYTES", 10)
+
+        await AivisSpeechTTSProvider._cache_put(_key("a"), b"x" * 6)
+        await AivisSpeechTTSProvider._cache_put(_key("b"), b"y" * 6)
+
+        assert await AivisSpeechTTSProvider._cache_get(_key("a")) is None
+        assert await AivisSpeechTTSProvider._cache_get(_key("b")) == b"y" * 6
+        assert AivisSpeechTTSProvider._cache_bytes == 6
+
+    @pytest.mark.asyncio
+    async def test_replacing_key_updates_size(self):
+        """Test that replacing an entry does not double count its bytes."""
+        await AivisSpeechTTSProvider._cache_put(_key("a"), b"x" * 5)
+        await AivisSpeechTTSProvider._cache_put(_key("a"), b"y" * 3)
+
+        assert len(AivisSpeechTTSProvider._cache) == 1
+        assert AivisSpeechTTSProvider._cache_bytes == 3
+        assert await AivisSpeechTTSProvider._cache_get(_key("a")) == b"y" * 3
+
+    @pytest.mark.asyncio
+    async def test_oversized_entry_is_skipped(self, monkeypatch):
+        """Test that audio larger than the byte cap is not cached."""
+        monkeypatch.setattr(AivisSpeechTTSProvider, "CACHE_MAX_BYTES", 4)
+        await AivisSpeechTTSProvider._cache_put(_key("small"), b"ok")
+
+        await AivisSpeechTTSProvider._cache_put(_key("big"), b"x" * 5)
+
+        assert await AivisSpeechTTSProvider._cache_get(_key("big")) is None
+        # The oversized entry must not evict what is already cached
+        assert await AivisSpeechTTSProvider._cache_get(_key("small")) == b"ok"
+        assert AivisSpeechTTSProvider._cache_bytes == 2
+
+    @pytest.mark.asyncio
+    async def test_zero_byte_budget_disables_cache(self, monkeypatch, mock_engine):
+        """Test that CACHE_MAX_BYTES=0 sends every request to the engine."""
+        monkeypatch.setattr(AivisSpeechTTSProvider, "CACHE_MAX_BYTES", 0)
+        calls = []
+        mock_engine(_engine_handler(calls))
+
+        await AivisSpeechTTSProvider.synthesize("キャッシュなし", voice="mao_normal")
+        await AivisSpeechTTSProvider.synthesize("キャッシュなし", voice="mao_normal")
+
+        assert len(AivisSpeechTTSProvider._cache) == 0
+        assert calls.count("/synthesis") == 2
+
+    @pytest.mark.asyncio
+    async def test_ja_alias_shares_entry(self, mock_engine):
+        """Test that "_ja" aliases hit the same cache entry as the base voice."""
+        calls = []
+        audio = _make_wav(20)
+        mock_engine(_engine_handler(calls, audio))
+
+        first = await AivisSpeechTTSProvider.synthesize("共有", voice="kohaku_normal")
+        second = await AivisSpeechTTSProvider.synthesize(
+            "共有", voice="kohaku_normal_ja"
+        )
+
+        assert first == second == audio
+        assert calls == ["/audio_query", "/synthesis"]
+        assert (
+            await AivisSpeechTTSProvider.get_cached_audio(
+                "共有", voice="kohaku_normal_ja"
+            )
+            == audio
+        )
+
+
+# ============================================================================
+# TEST SUITE 10: AudioQuery Forwarding
+# ============================================================================
+
+
+@pytest.mark.usefixtures("fresh_cache")
+class TestAudioQueryForwarding:
+    """Test suite for how the audio_query result is sent to /synthesis."""
+
+    QUERY = b'{"accent_phrases": [{"moras": []}], "speedScale": 1.0, "pitchScale": 0.0}'
+
+    def _install(self, mock_engine):
+        bodies = []
+
+        def handler(request):
+            if request.url.path == "/audio_query":
+                return httpx.Response(200, content=self.QUERY)
+            bodies.append(request.content)
+            return httpx.Response(200, content=_make_wav(10))
+
+        mock_engine(handler)
+        return bodies
+
+    @pytest.mark.asyncio
+    async def test_default_speed_forwards_query_verbatim(self, mock_engine):
+        """Test that the query bytes are forwarded untouched at speed 1.0."""
+        bodies = self._install(mock_engine)
+
+        await AivisSpeechTTSProvider.synthesize("そのまま", voice="mao_normal")
+
+        assert bodies == [self.QUERY]
+
+    @pytest.mark.asyncio
+    async def test_custom_speed_rewrites_only_speed_scale(self, mock_engine):
+        """Test that only speedScale changes when speed differs."""
+        bodies = self._install(mock_engine)
+
+        await AivisSpeechTTSProvider.synthesize(
+            "はやく", voice="mao_normal", speed=1.25
+        )
+
+        expected = orjson.loads(self.QUERY)
+        expected["speedScale"] = 1.25
+        assert len(bodies) == 1
+        assert orjson.loads(bodies[0]) == expected
+
+
+# ============================================================================
+# TEST SUITE 11: Streaming Synthesis
+# ============================================================================
+
+
+@pytest.mark.usefixtures("fresh_cache")
+class TestSynthesizeStream:
+    """Test suite for streamed synthesis."""
+
+    @pytest.mark.asyncio
+    async def test_engine_error_raised_before_stream(self, monkeypatch, mock_engine):
+        """Test that a synthesis failure raises and releases the engine slot."""
+        semaphore = asyncio.Semaphore(1)
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_semaphore", semaphore)
+
+        def handler(request):
+            if request.url.path == "/audio_query":
+                return httpx.Response(200, content=b"{}")
+            return httpx.Response(500, content=b"engine error")
+
+        mock_engine(handler)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await AivisSpeechTTSProvider.synthesize_stream("失敗", voice="mao_normal")
+
+        assert not semaphore.locked()
+
+    @pytest.mark.asyncio
+    async def test_complete_stream_is_cached(self, mock_engine):
+        """Test that audio is cached once the stream is fully consumed."""
+        calls = []
+        audio = _make_wav(100)
+        mock_engine(_engine_handler(calls, audio))
+
+        stream = await AivisSpeechTTSProvider.synthesize_stream(
+            "ストリーム", voice="kohaku_amama", chunk_size=32
+        )
+        chunks = [chunk async for chunk in stream]
+
+        assert len(chunks) > 1
+        assert b"".join(chunks) == audio
+        assert (
+            await AivisSpeechTTSProvider.get_cached_audio(
+                "ストリーム", voice="kohaku_amama"
+            )
+            == audio
+        )
+
+        # A second request is served from the cache without the engine
+        cached_stream = await AivisSpeechTTSProvider.synthesize_stream(
+            "ストリーム", voice="kohaku_amama"
+        )
+        assert b"".join([chunk async for chunk in cached_stream]) == audio
+        assert calls.count("/synthesis") == 1
+
+    @pytest.mark.asyncio
+    async def test_disconnected_stream_is_not_cached(self, mock_engine):
+        """Test that a partially consumed stream leaves nothing in the cache."""
+        mock_engine(_engine_handler([], _make_wav(100)))
+
+        stream = await AivisSpeechTTSProvider.synthesize_stream(
+            "切断", voice="kohaku_amama", chunk_size=32
+        )
+        await stream.__anext__()
+        await stream.aclose()
+
+        assert (
+            await AivisSpeechTTSProvider.get_cached_audio("切断", voice="kohaku_amama")
+            is None
+        )
+
+
+# ============================================================================
+# TEST SUITE 12: Health Check
+# ============================================================================
+
+
+class TestHealthCheck:
+    """Test suite for the memoized engine liveness probe."""
+
+    @pytest.fixture(autouse=True)
+    def reset_health(self, monkeypatch):
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_last_health", float("-inf"))
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_last_health_ok", False)
+
+    @pytest.mark.asyncio
+    async def test_probes_version_and_memoizes(self, mock_engine):
+        """Test that /version is probed once per TTL window."""
+        calls = []
+        mock_engine(_engine_handler(calls))
+
+        assert await AivisSpeechTTSProvider.health_check() is True
+        assert await AivisSpeechTTSProvider.health_check() is True
+
+        assert calls == ["/version"]
+
+    @pytest.mark.asyncio
+    async def test_probes_again_after_ttl(self, monkeypatch, mock_engine):
+        """Test that an expired result triggers a new probe."""
+        calls = []
+        mock_engine(_engine_handler(calls))
+        monkeypatch.setattr(AivisSpeechTTSProvider, "HEALTH_TTL", 0.0)
+
+        await AivisSpeechTTSProvider.health_check()
+        await AivisSpeechTTSProvider.health_check()
+
+        assert calls == ["/version", "/version"]
+
+    @pytest.mark.asyncio
+    async def test_unreachable_engine_is_unhealthy(self, mock_engine):
+        """Test that a failed probe is reported and memoized as unhealthy."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            raise httpx.ConnectError("connection refused", request=request)
+
+        mock_engine(handler)
+
+        assert await AivisSpeechTTSProvider.health_check() is False
+        assert await AivisSpeechTTSProvider.health_check() is False
+        assert calls == ["/version"]
+
+
+# ============================================================================
+# TEST SUITE 13: Speech API Routes
+# ============================================================================
+
+
+@pytest.fixture
+def client():
+    """Create test client after environment variables have been cleared by conftest."""
+    from api.main import app
+
+    return TestClient(app)
+
+
+def _unreachable_engine(request):
+    raise httpx.ConnectError("connection refused", request=request)
+
+
+@pytest.mark.usefixtures("fresh_cache")
+class TestSpeechRoutes:
+    """Test suite for the /v1/audio HTTP endpoints."""
+
+    def test_speech_engine_down_returns_503(self, client, mock_engine):
+        """Test that an unreachable engine maps to 503 with Retry-After."""
+        mock_engine(_unreachable_engine)
+
+        response = client.post(
+            "/api/v1/audio/speech",
+            json={"input": "接続テスト", "voice": "mao_normal"},
+        )
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+
+    def test_voices_engine_down_returns_503(self, client, mock_engine, monkeypatch):
+        """Test that listing voices maps an unreachable engine to 503."""
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_voices", None)
+        mock_engine(_unreachable_engine)
+
+        response = client.get("/api/v1/audio/voices")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+
+    def test_speech_queue_full_returns_429(self, client, mock_engine, monkeypatch):
+        """Test that a full engine queue is rejected with 429."""
+        calls = []
+        mock_engine(_engine_handler(calls))
+        monkeypatch.setattr(
+            AivisSpeechTTSProvider, "_waiting", AivisSpeechTTSProvider.QUEUE_LIMIT
+        )
+
+        response = client.post(
+            "/api/v1/audio/speech",
+            json={"input": "混雑テスト", "voice": "mao_normal"},
+        )
+
+        assert response.status_code == 429
+        assert calls == []
+
+    def test_preview_is_cacheable(self, client, monkeypatch):
+        """Test that previews are served with a long-lived Cache-Control."""
+        preview = _make_wav(10)
+        monkeypatch.setattr(
+            AivisSpeechTTSProvider, "_previews", {"kohaku_normal": preview}
+        )
+
+        response = client.get("/api/v1/audio/preview/kohaku_normal")
+
+        assert response.status_code == 200
+        assert response.content == preview
+        assert response.headers["Cache-Control"] == "public, max-age=86400, immutable"
+
+    def test_preview_unknown_voice_returns_404(self, client):
+        """Test that previews for unknown voices return 404."""
+        response = client.get("/api/v1/audio/preview/nobody_normal")
+        assert response.status_code == 404
+
+    def test_voices_fetched_once_within_ttl(self, client, mock_engine, monkeypatch):
+        """Test that the speaker catalog is fetched once and cached as a tuple."""
+        monkeypatch.setattr(AivisSpeechTTSProvider, "_voices", None)
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(
+                200,
+                json=[
+                    {"name": "まお", "styles": [{"name": "ノーマル", "id": 888753760}]}
+                ],
+            )
+
+        mock_engine(handler)
+
+        first = client.get("/api/v1/audio/voices")
+        second = client.get("/api/v1/audio/voices")
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert first.json()["data"][0]["style_id"] == 888753760
+        assert calls == ["/speakers"]
+        assert isinstance(AivisSpeechTTSProvider._voices, tuple)